@@ -3,14 +3,16 @@ from __future__ import annotations
 import datetime as dt
 import json
 import re
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from html import unescape
-from typing import Iterable
+from typing import Iterable, Iterator
 from urllib.error import HTTPError, URLError
 from urllib.parse import urlparse
 from urllib.request import ProxyHandler, Request, build_opener, install_opener, urlopen
 
-from .models import Holding
+from .models import Holding, ListedQuote
 
 REQUEST_TIMEOUT = 12
 UA = (
@@ -30,24 +32,168 @@ def configure_proxy(proxy_url: str | None) -> None:
     """
     if not proxy_url:
         return
-    parsed = urlparse(proxy_url)
-    if not parsed.scheme or not parsed.netloc:
-        raise ValueError(f"无效代理地址: {proxy_url}")
+    _validate_proxy_url(proxy_url)
 
     opener = build_opener()
     opener.add_handler(ProxyHandler({"http": proxy_url, "https": proxy_url}))
     install_opener(opener)
 
 
+EGRESS_MAX_FAILURES = 2
+EGRESS_COOLDOWN_SECONDS = 60.0
+
+
+class EgressRoute:
+    """One outbound route: a proxy, or the default route when proxy_url is None.
+
+    The default ("direct") route goes through urllib's installed opener, so it
+    keeps honouring ``configure_proxy`` and environment proxy settings.
+    """
+
+    def __init__(self, proxy_url: str | None) -> None:
+        self.proxy_url = proxy_url
+        self.name = proxy_url or "direct"
+        self.opener = (
+            build_opener(ProxyHandler({"http": proxy_url, "https": proxy_url}))
+            if proxy_url
+            else None
+        )
+        # Per-host state: balancing and eviction are both keyed by upstream host.
+        self.outstanding: dict[str, int] = {}
+        self.failures: dict[str, int] = {}
+        self.evicted_until: dict[str, float] = {}
+
+    def open(self, req: Request):
+        if self.opener is None:
+            return urlopen(req, timeout=REQUEST_TIMEOUT)
+        return self.opener.open(req, timeout=REQUEST_TIMEOUT)
+
+
+class EgressPool:
+    """Least-outstanding-requests load balancing across egress routes, per host.
+
+    Ties are broken round-robin per host, so sequential requests still rotate
+    through every healthy route. A route that fails at the connection level
+    (timeout, refused, reset, proxy gateway error) ``max_failures`` times in a
+    row for a host is evicted for that host only, for ``cooldown_seconds``;
+    other hosts keep using it. After the cooldown it is re-admitted on
+    probation: the next request either resets its failure count (success) or
+    evicts it again (another failure).
+    """
+
+    def __init__(
+        self,
+        proxy_urls: Iterable[str],
+        include_direct: bool = True,
+        max_failures: int = EGRESS_MAX_FAILURES,
+        cooldown_seconds: float = EGRESS_COOLDOWN_SECONDS,
+    ) -> None:
+        routes = [EgressRoute(None)] if include_direct else []
+        for url in proxy_urls:
+            _validate_proxy_url(url)
+            routes.append(EgressRoute(url))
+        if not routes:
+            raise ValueError("出口池为空：至少需要一个代理或直连")
+        self.routes = routes
+        self.max_failures = max_failures
+        self.cooldown_seconds = cooldown_seconds
+        self._rotation: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def healthy_routes(self, host: str, now: float | None = None) -> list[EgressRoute]:
+        now = time.monotonic() if now is None else now
+        return [r for r in self.routes if r.evicted_until.get(host, 0.0) <= now]
+
+    def acquire(self, host: str) -> EgressRoute:
+        with self._lock:
+            candidates = self.healthy_routes(host)
+            if not candidates:
+                # Every route is evicted for this host: use the one that
+                # recovers soonest rather than failing outright.
+                candidates = [min(self.routes, key=lambda r: r.evicted_until.get(host, 0.0))]
+            offset = self._rotation.get(host, 0) % len(candidates)
+            self._rotation[host] = offset + 1
+            rotated = candidates[offset:] + candidates[:offset]
+            route = min(rotated, key=lambda r: r.outstanding.get(host, 0))
+            route.outstanding[host] = route.outstanding.get(host, 0) + 1
+            return route
+
+    def release(self, route: EgressRoute, host: str, failed: bool = False) -> None:
+        with self._lock:
+            route.outstanding[host] = max(0, route.outstanding.get(host, 0) - 1)
+            if not failed:
+                route.failures[host] = 0
+                return
+            route.failures[host] = route.failures.get(host, 0) + 1
+            if route.failures[host] >= self.max_failures:
+                route.evicted_until[host] = time.monotonic() + self.cooldown_seconds
+
+
+_EGRESS_POOL: EgressPool | None = None
+
+
+def _validate_proxy_url(proxy_url: str) -> None:
+    parsed = urlparse(proxy_url)
+    if not parsed.scheme or not parsed.netloc:
+        raise ValueError(f"无效代理地址: {proxy_url}")
+
+
+def configure_egress_pool(
+    proxy_urls: Iterable[str] | None,
+    include_direct: bool = True,
+) -> EgressPool | None:
+    """Spread upstream requests across several proxies (plus the direct route).
+
+    Passing no proxy URLs disables the pool and restores the default opener path.
+    """
+    global _EGRESS_POOL
+    urls = [u.strip() for u in (proxy_urls or []) if u.strip()]
+    _EGRESS_POOL = EgressPool(urls, include_direct=include_direct) if urls else None
+    return _EGRESS_POOL
+
+
+PROXY_GATEWAY_ERROR_CODES = {502, 503, 504}
+
+
+def _is_route_failure(exc: BaseException, route: EgressRoute) -> bool:
+    """Whether an error points at the egress route rather than the upstream.
+
+    Upstream HTTP errors do not count, except gateway errors answered by a proxy.
+    """
+    if isinstance(exc, HTTPError):
+        return route.proxy_url is not None and exc.code in PROXY_GATEWAY_ERROR_CODES
+    if isinstance(exc, URLError):
+        return isinstance(exc.reason, OSError)
+    return isinstance(exc, OSError)
+
+
+def _open(req: Request) -> str:
+    pool = _EGRESS_POOL
+    if pool is None:
+        with urlopen(req, timeout=REQUEST_TIMEOUT) as resp:
+            return resp.read().decode("utf-8", errors="ignore")
+
+    host = urlparse(req.full_url).netloc
+    route = pool.acquire(host)
+    failed = False
+    try:
+        with route.open(req) as resp:
+            return resp.read().decode("utf-8", errors="ignore")
+    except OSError as exc:
+        failed = _is_route_failure(exc, route)
+        raise
+    finally:
+        pool.release(route, host, failed=failed)
+
+
 def _http_get(url: str, referer: str | None = None) -> str:
     headers = {"User-Agent": UA}
     if referer:
         headers["Referer"] = referer
     req = Request(url, headers=headers)
     try:
-        with urlopen(req, timeout=REQUEST_TIMEOUT) as resp:
-            return resp.read().decode("utf-8", errors="ignore")
-    except (HTTPError, URLError, TimeoutError) as exc:
+        return _open(req)
+    except (HTTPError, URLError, TimeoutError, ConnectionError) as exc:
         raise DataSourceError(f"HTTP请求失败: {url} -> {exc}") from exc
 
 
@@ -132,18 +278,13 @@ def _market_group(symbol: str) -> str:
     return "other"
 
 
-def _fetch_sina_group_quotes(symbol_pairs: list[tuple[str, str]]) -> dict[str, float]:
-    if not symbol_pairs:
-        return {}
-    symbols = ",".join(sym for _, sym in symbol_pairs)
-    url = f"https://hq.sinajs.cn/list={symbols}"
-    text = _http_get(url, referer="https://finance.sina.com.cn")
-    lines = text.splitlines()
+def _iter_sina_lines(text: str) -> Iterator[tuple[str, list[str]]]:
+    """Yield ``(symbol, fields)`` per ``hq_str_`` line of a Sina quote response.
 
-    by_symbol: dict[str, float] = {}
-    for line in lines:
-        if '="";' in line:
-            continue
+    Sina answers unknown symbols with an empty line (``hq_str_x="";``), which
+    is yielded with empty fields.
+    """
+    for line in text.splitlines():
         lhs_rhs = line.split("=", 1)
         if len(lhs_rhs) != 2:
             continue
@@ -151,9 +292,21 @@ def _fetch_sina_group_quotes(symbol_pairs: list[tuple[str, str]]) -> dict[str, f
         m = re.search(r"hq_str_(\w+)", lhs)
         if not m:
             continue
-        symbol = m.group(1)
         data = rhs.strip().strip('";')
-        fields = data.split(",")
+        yield m.group(1), data.split(",") if data else []
+
+
+def _fetch_sina_group_quotes(symbol_pairs: list[tuple[str, str]]) -> dict[str, float]:
+    if not symbol_pairs:
+        return {}
+    symbols = ",".join(sym for _, sym in symbol_pairs)
+    url = f"https://hq.sinajs.cn/list={symbols}"
+    text = _http_get(url, referer="https://finance.sina.com.cn")
+
+    by_symbol: dict[str, float] = {}
+    for symbol, fields in _iter_sina_lines(text):
+        if not fields:
+            continue
         change = _parse_sina_change_percent(symbol, fields)
         if change is not None:
             by_symbol[symbol] = change
@@ -218,6 +371,69 @@ def _parse_sina_change_percent(symbol: str, fields: list[str]) -> float | None:
     return None
 
 
+def _to_listed_fund_symbol(fund_code: str) -> str | None:
+    """Exchange symbol for a fund code in the LOF/ETF ranges, else None.
+
+    Off-exchange fund codes overlap with stock codes (e.g. 000001), so only
+    the exchange fund ranges are considered listed candidates.
+    """
+    c = fund_code.strip()
+    if not re.fullmatch(r"\d{6}", c):
+        return None
+    if c.startswith(("15", "16", "18")):
+        return f"sz{c}"
+    if c.startswith(("50", "51", "52", "56", "58")):
+        return f"sh{c}"
+    return None
+
+
+def _parse_sina_listed_quote(symbol: str, fields: list[str]) -> ListedQuote | None:
+    try:
+        prev_close = float(fields[2])
+        price = float(fields[3])
+        quote_time = dt.datetime.strptime(f"{fields[30]} {fields[31]}", "%Y-%m-%d %H:%M:%S")
+    except (ValueError, IndexError):
+        return None
+    if prev_close <= 0 or price <= 0:
+        return None
+    return ListedQuote(symbol=symbol, price=price, prev_close=prev_close, quote_time=quote_time)
+
+
+def fetch_listed_fund_quotes(
+    fund_codes: Iterable[str],
+) -> tuple[dict[str, ListedQuote | None], set[str]]:
+    """Batch-fetch exchange quotes for listed share classes in one Sina request.
+
+    Returns ``(quotes, unlisted)``. ``quotes`` holds codes Sina answered with
+    data; the value is None when there is no usable price this round (not
+    traded yet, suspended). ``unlisted`` holds codes Sina explicitly answered
+    with an empty line. Codes outside the LOF/ETF ranges, or missing from a
+    truncated/throttled response, are in neither.
+    """
+    symbol_pairs: list[tuple[str, str]] = []
+    for code in fund_codes:
+        symbol = _to_listed_fund_symbol(code)
+        if symbol:
+            symbol_pairs.append((code, symbol))
+    if not symbol_pairs:
+        return {}, set()
+
+    url = f"https://hq.sinajs.cn/list={','.join(sym for _, sym in symbol_pairs)}"
+    text = _http_get(url, referer="https://finance.sina.com.cn")
+
+    by_symbol: dict[str, ListedQuote | None] = {}
+    empty_symbols: set[str] = set()
+    for symbol, fields in _iter_sina_lines(text):
+        if fields:
+            by_symbol[symbol] = _parse_sina_listed_quote(symbol, fields)
+        else:
+            empty_symbols.add(symbol)
+
+    quotes = {raw: by_symbol[sym] for raw, sym in symbol_pairs if sym in by_symbol}
+    unlisted = {raw for raw, sym in symbol_pairs if sym in empty_symbols}
+    return quotes, unlisted
+
+
 def fetch_tracking_index_candidates(fund_code: str) -> list[str]:
     url = f"https://fundf10.eastmoney.com/jbgk_{fund_code}.html"
     text = _http_get(url)
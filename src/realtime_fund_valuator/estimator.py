@@ -1,27 +1,170 @@
 from __future__ import annotations
 
 import datetime as dt
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from .data_sources import (
     DataSourceError,
     fetch_fund_holdings,
     fetch_fund_last_nav,
+    fetch_listed_fund_quotes,
     fetch_realtime_quote_change_percent,
     fetch_tracking_index_candidates,
 )
-from .models import FundEstimate
+from .models import FundEstimate, ListedQuote
 
+LISTED_SOURCE = "eastmoney_fundgz+sina_hq_listed"
 HOLDINGS_SOURCE = "eastmoney_holdings+eastmoney_fundgz+sina_hq"
 INDEX_SOURCE = "eastmoney_index_profile+eastmoney_fundgz+sina_hq"
 UNAVAILABLE_SOURCE = "eastmoney_fundgz"
 
+LISTED_QUOTE_MAX_AGE_SECONDS = 300
+# Sina exchange quotes are stamped in Beijing time (no DST, fixed UTC+8).
+BEIJING_TZ = dt.timezone(dt.timedelta(hours=8), "Asia/Shanghai")
 
-def estimate_fund(fund_code: str, min_coverage: float = 35.0) -> FundEstimate:
+# Session caches: whether a fund has a listed share class (detected once per
+# process), the last NAV fetched per fund, and the quote day on which a fund's
+# NAV date was found not to fit the fast path.
+_LISTED_FUNDS: dict[str, bool] = {}
+_NAV_CACHE: dict[str, tuple[float, str]] = {}
+_NAV_MISMATCH_DAYS: dict[str, dt.date] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _beijing_now() -> dt.datetime:
+    return dt.datetime.now(BEIJING_TZ).replace(tzinfo=None)
+
+
+def _previous_trading_day(day: dt.date) -> dt.date:
+    """Previous weekday; exchange holidays are not modelled.
+
+    After a holiday this yields a non-trading day, so the NAV date check fails
+    and the fund falls back to the holdings/index path.
+    """
+    day -= dt.timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= dt.timedelta(days=1)
+    return day
+
+
+def _is_quote_fresh(quote: ListedQuote, now: dt.datetime) -> bool:
+    """``now`` must be naive Beijing time, like ``quote.quote_time``."""
+    if quote.quote_time.date() != now.date():
+        return False
+    t = quote.quote_time.time()
+    # Session-closing prints stay valid until the next session opens.
+    if t >= dt.time(15, 0):
+        return True
+    if dt.time(11, 30) <= t < dt.time(13, 0) and now.time() < dt.time(13, 0):
+        return True
+    return (now - quote.quote_time).total_seconds() <= LISTED_QUOTE_MAX_AGE_SECONDS
+
+
+def _cached_last_nav(
+    fund_code: str,
+    expected_nav_date: str,
+    now: dt.datetime,
+) -> tuple[float, str]:
+    """Last NAV, reused only while it is still the one dated ``expected_nav_date``.
+
+    After the 15:00 close the day's NAV may be published at any moment, so the
+    cache is revalidated on every call from then on.
+    """
+    with _CACHE_LOCK:
+        cached = _NAV_CACHE.get(fund_code)
+    if cached and cached[1] == expected_nav_date and now.time() < dt.time(15, 0):
+        return cached
+    last_nav, nav_date = fetch_fund_last_nav(fund_code)
+    with _CACHE_LOCK:
+        _NAV_CACHE[fund_code] = (last_nav, nav_date)
+    return last_nav, nav_date
+
+
+def fetch_session_listed_quotes(fund_codes: list[str]) -> dict[str, ListedQuote]:
+    """One batched quote request covering every known or not-yet-probed listed fund.
+
+    Only funds Sina explicitly answers with an empty line are remembered as
+    unlisted and not asked for again during this process. Funds missing from
+    the response (truncated or throttled) stay unprobed for the next round.
+    """
+    with _CACHE_LOCK:
+        wanted = [c for c in fund_codes if _LISTED_FUNDS.get(c, True)]
+    if not wanted:
+        return {}
+    try:
+        quotes, unlisted = fetch_listed_fund_quotes(wanted)
+    except DataSourceError:
+        return {}
+    with _CACHE_LOCK:
+        for code in quotes:
+            _LISTED_FUNDS[code] = True
+        for code in unlisted:
+            _LISTED_FUNDS[code] = False
+    return {code: q for code, q in quotes.items() if q is not None}
+
+
+def estimate_listed_fund(
+    fund_code: str,
+    quote: ListedQuote,
+) -> tuple[FundEstimate | None, tuple[float, str] | None]:
+    """Estimate from the listed share class price.
+
+    Returns ``(estimate, nav)``. ``estimate`` is None when the caller should
+    fall back to holdings/index; ``nav`` is the ``(last_nav, nav_date)`` fetched
+    along the way, if any, so the fallback need not fetch it again.
+
+    The premium/discount of the previous close over the NAV of that same day is
+    assumed to hold intraday, so the estimate is last_nav * price / prev_close.
+    The fast path is skipped when the quote is stale or the last NAV is not
+    dated the trading day before the quote (already-published or lagging NAV);
+    such a mismatch is remembered for the rest of the quote day.
+    """
+    now = _beijing_now()
+    if not _is_quote_fresh(quote, now):
+        return None, None
+    quote_day = quote.quote_time.date()
+    with _CACHE_LOCK:
+        if _NAV_MISMATCH_DAYS.get(fund_code) == quote_day:
+            return None, None
+    expected_nav_date = _previous_trading_day(quote_day).isoformat()
+    try:
+        last_nav, nav_date = _cached_last_nav(fund_code, expected_nav_date, now)
+    except Exception:
+        return None, None
+    if nav_date != expected_nav_date:
+        with _CACHE_LOCK:
+            _NAV_MISMATCH_DAYS[fund_code] = quote_day
+        return None, (last_nav, nav_date)
+
+    premium = (quote.prev_close / last_nav - 1) * 100
+    change = (quote.price / quote.prev_close - 1) * 100
+    estimate = FundEstimate(
+        fund_code=fund_code,
+        timestamp=dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        last_nav=last_nav,
+        estimated_nav=last_nav * quote.price / quote.prev_close,
+        estimated_change_percent=change,
+        method="listed",
+        coverage_percent=100.0,
+        detail=(
+            f"基于场内份额{quote.symbol}实时价{quote.price:.3f}估值，"
+            f"昨收溢价{premium:+.3f}%，行情时间{quote.quote_time:%H:%M:%S}，净值日期{nav_date}"
+        ),
+        source_api=LISTED_SOURCE,
+    )
+    return estimate, (last_nav, nav_date)
+
+
+def estimate_fund(
+    fund_code: str,
+    min_coverage: float = 35.0,
+    nav: tuple[float, str] | None = None,
+) -> FundEstimate:
     ts = dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     try:
-        last_nav, nav_date = fetch_fund_last_nav(fund_code)
+        last_nav, nav_date = nav if nav is not None else fetch_fund_last_nav(fund_code)
     except Exception as exc:
         return FundEstimate(
             fund_code=fund_code,
@@ -108,9 +251,18 @@ def estimate_fund(fund_code: str, min_coverage: float = 35.0) -> FundEstimate:
     )
 
 
-def _estimate_fund_safe(fund_code: str, min_coverage: float) -> FundEstimate:
+def _estimate_fund_safe(
+    fund_code: str,
+    min_coverage: float,
+    listed_quote: ListedQuote | None = None,
+) -> FundEstimate:
     try:
-        return estimate_fund(fund_code, min_coverage=min_coverage)
+        nav = None
+        if listed_quote is not None:
+            fast, nav = estimate_listed_fund(fund_code, listed_quote)
+            if fast is not None:
+                return fast
+        return estimate_fund(fund_code, min_coverage=min_coverage, nav=nav)
     except DataSourceError as exc:
         now = dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         return FundEstimate(
@@ -134,12 +286,15 @@ def estimate_many(
     if not fund_codes:
         return []
 
+    listed_quotes = fetch_session_listed_quotes(fund_codes)
     workers = max(1, min(max_workers, len(fund_codes)))
     results_by_code: dict[str, FundEstimate] = {}
 
     with ThreadPoolExecutor(max_workers=workers) as executor:
         future_map = {
-            executor.submit(_estimate_fund_safe, code, min_coverage): code
+            executor.submit(
+                _estimate_fund_safe, code, min_coverage, listed_quotes.get(code)
+            ): code
             for code in fund_codes
         }
         for future in as_completed(future_map):
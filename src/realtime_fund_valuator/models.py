@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import datetime as dt
 from dataclasses import dataclass, field
 from typing import Literal
 
@@ -17,6 +18,14 @@ class Quote:
     change_percent: float
 
 
+@dataclass(slots=True)
+class ListedQuote:
+    symbol: str
+    price: float
+    prev_close: float
+    quote_time: dt.datetime
+
+
 @dataclass(slots=True)
 class FundEstimate:
     fund_code: str
@@ -24,7 +33,7 @@ class FundEstimate:
     last_nav: float
     estimated_nav: float
     estimated_change_percent: float
-    method: Literal["holdings", "index", "unavailable"]
+    method: Literal["listed", "holdings", "index", "unavailable"]
     coverage_percent: float
     detail: str
     source_api: str = ""
@@ -5,7 +5,7 @@ import time
 from collections import Counter
 from pathlib import Path
 
-from .data_sources import configure_proxy
+from .data_sources import configure_egress_pool, configure_proxy
 from .estimator import estimate_many
 from .models import FundEstimate
 
@@ -70,7 +70,7 @@ def split_effective_and_failed(estimates: list[FundEstimate]) -> tuple[list[Fund
     hits: list[FundEstimate] = []
     fails: list[FundEstimate] = []
     for e in estimates:
-        if e.method in {"holdings", "index"} and e.estimated_nav > 0:
+        if e.method in {"listed", "holdings", "index"} and e.estimated_nav > 0:
             hits.append(e)
         else:
             fails.append(e)
@@ -121,15 +121,26 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument("--interval-seconds", type=int, default=60, help="刷新周期（固定60秒）")
     p.add_argument("--min-coverage", type=float, default=35.0, help="持仓估值最小覆盖率")
     p.add_argument("--proxy", default="", help="可选代理地址，例如 http://127.0.0.1:7890")
+    p.add_argument(
+        "--egress-proxy",
+        action="append",
+        default=[],
+        help="出口代理池成员（可重复），请求按主机在代理与直连间做最少在途负载均衡",
+    )
+    p.add_argument("--no-direct", action="store_true", help="出口池不包含直连线路")
     p.add_argument("--max-workers", type=int, default=8, help="并行估值线程数")
     p.add_argument("--once", action="store_true", help="只执行一次，便于联调")
     return p
 
 
 def main() -> None:
-    args = build_parser().parse_args()
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.no_direct and not args.egress_proxy:
+        parser.error("--no-direct 需要同时指定至少一个 --egress-proxy")
     interval = 60 if args.interval_seconds != 60 else args.interval_seconds
     configure_proxy(args.proxy.strip() or None)
+    configure_egress_pool(args.egress_proxy, include_direct=not args.no_direct)
 
     while True:
         run_once(
@@ -0,0 +1,154 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import realtime_fund_valuator.data_sources as ds
+from realtime_fund_valuator.data_sources import EgressPool
+
+
+def _start_stub_proxy(name: str, status: int = 200) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = f"{name}|{self.path}".encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def stub_proxies():
+    servers = [_start_stub_proxy("p1"), _start_stub_proxy("p2")]
+    yield [f"http://127.0.0.1:{s.server_address[1]}" for s in servers]
+    for s in servers:
+        s.shutdown()
+    ds.configure_egress_pool(None)
+
+
+def test_http_get_routes_through_stub_proxies(stub_proxies):
+    ds.configure_egress_pool(stub_proxies, include_direct=False)
+    text = ds._http_get("http://upstream.invalid/js/161725.js")
+    name, path = text.split("|")
+    assert name in {"p1", "p2"}
+    assert path == "http://upstream.invalid/js/161725.js"
+
+
+def test_acquire_picks_least_outstanding_per_host(stub_proxies):
+    pool = EgressPool(stub_proxies, include_direct=True)
+    first = pool.acquire("hq.sinajs.cn")
+    second = pool.acquire("hq.sinajs.cn")
+    third = pool.acquire("hq.sinajs.cn")
+    assert len({first.name, second.name, third.name}) == 3
+    # Another host has its own outstanding counts.
+    assert pool.acquire("fundgz.1234567.com.cn") is first
+    pool.release(second, "hq.sinajs.cn")
+    assert pool.acquire("hq.sinajs.cn") is second
+
+
+def test_sequential_requests_spread_across_all_routes(stub_proxies):
+    pool = EgressPool(stub_proxies + ["http://127.0.0.1:9"], include_direct=True)
+    used = []
+    for _ in range(8):
+        route = pool.acquire("hq.sinajs.cn")
+        used.append(route.name)
+        pool.release(route, "hq.sinajs.cn")
+    assert used == [r.name for r in pool.routes] * 2
+
+
+def _closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_refused_proxy_is_evicted():
+    pool = ds.configure_egress_pool([f"http://127.0.0.1:{_closed_port()}"], include_direct=False)
+    try:
+        for _ in range(2):
+            with pytest.raises(ds.DataSourceError):
+                ds._http_get("http://upstream.invalid/x")
+        assert pool.healthy_routes("upstream.invalid") == []
+    finally:
+        ds.configure_egress_pool(None)
+
+
+def test_hanging_proxy_is_evicted(monkeypatch):
+    monkeypatch.setattr(ds, "REQUEST_TIMEOUT", 0.2)
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    pool = ds.configure_egress_pool(
+        [f"http://127.0.0.1:{listener.getsockname()[1]}"], include_direct=False
+    )
+    try:
+        for _ in range(2):
+            with pytest.raises(ds.DataSourceError):
+                ds._http_get("http://upstream.invalid/x")
+        assert pool.healthy_routes("upstream.invalid") == []
+    finally:
+        ds.configure_egress_pool(None)
+        listener.close()
+
+
+def test_proxy_gateway_error_counts_but_upstream_error_does_not():
+    bad_gateway = _start_stub_proxy("gw", status=502)
+    not_found = _start_stub_proxy("nf", status=404)
+    try:
+        for server, evicted in ((bad_gateway, True), (not_found, False)):
+            pool = ds.configure_egress_pool(
+                [f"http://127.0.0.1:{server.server_address[1]}"], include_direct=False
+            )
+            for _ in range(2):
+                with pytest.raises(ds.DataSourceError):
+                    ds._http_get("http://upstream.invalid/x")
+            assert (pool.healthy_routes("upstream.invalid") == []) is evicted
+    finally:
+        bad_gateway.shutdown()
+        not_found.shutdown()
+        ds.configure_egress_pool(None)
+
+
+def test_timeouts_evict_route_until_cooldown(stub_proxies, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ds.time, "monotonic", lambda: now[0])
+    pool = EgressPool(stub_proxies, include_direct=False, max_failures=2, cooldown_seconds=30)
+    bad = pool.routes[0]
+    for _ in range(2):
+        pool.release(bad, "h", failed=True)
+    assert bad not in pool.healthy_routes("h")
+    assert all(pool.acquire("h") is not bad for _ in range(3))
+
+    now[0] += 31
+    assert bad in pool.healthy_routes("h")
+
+
+def test_eviction_is_per_host(stub_proxies):
+    pool = EgressPool(stub_proxies, include_direct=True, max_failures=2)
+    bad = pool.routes[1]
+    for _ in range(2):
+        pool.release(bad, "fundf10.eastmoney.com", failed=True)
+    assert bad not in pool.healthy_routes("fundf10.eastmoney.com")
+    assert pool.healthy_routes("hq.sinajs.cn") == pool.routes
+    used = {pool.acquire("hq.sinajs.cn").name for _ in range(3)}
+    assert bad.name in used
+
+
+def test_all_routes_evicted_still_returns_a_route(stub_proxies):
+    pool = EgressPool(stub_proxies, include_direct=False, max_failures=1)
+    for route in pool.routes:
+        pool.release(route, "h", failed=True)
+    assert pool.acquire("h") in pool.routes
+
+
+def test_empty_pool_rejected():
+    with pytest.raises(ValueError):
+        EgressPool([], include_direct=False)
@@ -1,9 +1,11 @@
+import datetime as dt
+
 import realtime_fund_valuator.estimator as estimator
-from realtime_fund_valuator.models import FundEstimate
+from realtime_fund_valuator.models import FundEstimate, ListedQuote
 
 
 def test_estimate_many_keeps_input_order(monkeypatch):
-    def fake_estimate_fund(code: str, min_coverage: float = 35.0) -> FundEstimate:
+    def fake_estimate_fund(code: str, min_coverage: float = 35.0, nav=None) -> FundEstimate:
         return FundEstimate(
             fund_code=code,
             timestamp="2026-01-01 00:00:00",
@@ -30,3 +32,207 @@ def test_estimate_fund_nav_failure_has_source(monkeypatch):
     out = estimator.estimate_fund("000001")
     assert out.method == "unavailable"
     assert out.source_api == "eastmoney_fundgz"
+
+
+BEIJING_NOW = dt.datetime(2026, 1, 6, 10, 20, 0)  # Tuesday
+
+
+def _listed_quote(quote_time: dt.datetime = BEIJING_NOW, price: float = 1.02) -> ListedQuote:
+    return ListedQuote(symbol="sz161725", price=price, prev_close=1.0, quote_time=quote_time)
+
+
+def _fresh_listed_setup(monkeypatch, nav_date: str = "2026-01-05"):
+    monkeypatch.setattr(estimator, "_beijing_now", lambda: BEIJING_NOW)
+    monkeypatch.setattr(estimator, "_NAV_CACHE", {})
+    monkeypatch.setattr(estimator, "_LISTED_FUNDS", {})
+    monkeypatch.setattr(estimator, "_NAV_MISMATCH_DAYS", {})
+    nav_calls: list[str] = []
+
+    def fake_fetch_nav(code: str) -> tuple[float, str]:
+        nav_calls.append(code)
+        return 0.8, nav_date
+
+    monkeypatch.setattr(estimator, "fetch_fund_last_nav", fake_fetch_nav)
+    return nav_calls
+
+
+def test_estimate_listed_fund_uses_quote_and_nav(monkeypatch):
+    _fresh_listed_setup(monkeypatch)
+    out, nav = estimator.estimate_listed_fund("161725", _listed_quote())
+    assert nav == (0.8, "2026-01-05")
+    assert out.method == "listed"
+    assert out.source_api == estimator.LISTED_SOURCE
+    assert round(out.estimated_nav, 4) == 0.816
+    assert round(out.estimated_change_percent, 3) == 2.0
+
+
+def test_estimate_listed_fund_stale_quote_returns_none(monkeypatch):
+    _fresh_listed_setup(monkeypatch)
+    quote = _listed_quote(BEIJING_NOW - dt.timedelta(minutes=10))
+    assert estimator.estimate_listed_fund("161725", quote) == (None, None)
+
+
+def test_estimate_listed_fund_nav_already_published_returns_none(monkeypatch):
+    _fresh_listed_setup(monkeypatch, nav_date="2026-01-06")
+    assert estimator.estimate_listed_fund("161725", _listed_quote()) == (None, (0.8, "2026-01-06"))
+
+
+def test_estimate_listed_fund_lagging_nav_returns_none(monkeypatch):
+    _fresh_listed_setup(monkeypatch, nav_date="2026-01-02")
+    assert estimator.estimate_listed_fund("161725", _listed_quote()) == (None, (0.8, "2026-01-02"))
+
+
+def test_estimate_listed_fund_nav_mismatch_remembered_for_the_day(monkeypatch):
+    nav_calls = _fresh_listed_setup(monkeypatch, nav_date="2026-01-02")
+    for _ in range(3):
+        estimator.estimate_listed_fund("161725", _listed_quote())
+    assert nav_calls == ["161725"]
+
+
+def test_cached_nav_refetched_when_date_changes(monkeypatch):
+    _fresh_listed_setup(monkeypatch)
+    estimator._NAV_CACHE["161725"] = (0.7, "2026-01-02")
+    got = estimator._cached_last_nav("161725", "2026-01-05", BEIJING_NOW)
+    assert got == (0.8, "2026-01-05")
+
+
+def test_cached_nav_revalidated_after_close(monkeypatch):
+    nav_calls = _fresh_listed_setup(monkeypatch)
+    estimator._NAV_CACHE["161725"] = (0.7, "2026-01-05")
+    assert estimator._cached_last_nav("161725", "2026-01-05", BEIJING_NOW) == (0.7, "2026-01-05")
+    assert nav_calls == []
+    evening = BEIJING_NOW.replace(hour=20)
+    assert estimator._cached_last_nav("161725", "2026-01-05", evening) == (0.8, "2026-01-05")
+    assert nav_calls == ["161725"]
+
+
+def test_estimate_listed_fund_falls_back_once_nav_published_in_evening(monkeypatch):
+    _fresh_listed_setup(monkeypatch, nav_date="2026-01-06")
+    monkeypatch.setattr(estimator, "_beijing_now", lambda: BEIJING_NOW.replace(hour=20))
+    estimator._NAV_CACHE["161725"] = (0.8, "2026-01-05")
+    quote = _listed_quote(BEIJING_NOW.replace(hour=15, minute=0))
+    assert estimator.estimate_listed_fund("161725", quote)[0] is None
+
+
+def test_previous_trading_day_skips_weekend():
+    assert estimator._previous_trading_day(dt.date(2026, 1, 5)) == dt.date(2026, 1, 2)
+    assert estimator._previous_trading_day(dt.date(2026, 1, 6)) == dt.date(2026, 1, 5)
+
+
+def test_quote_fresh_lunch_break():
+    quote = _listed_quote(dt.datetime(2026, 1, 6, 11, 30, 0))
+    assert estimator._is_quote_fresh(quote, dt.datetime(2026, 1, 6, 12, 45))
+    assert not estimator._is_quote_fresh(quote, dt.datetime(2026, 1, 6, 13, 10))
+
+
+def test_quote_fresh_after_close():
+    quote = _listed_quote(dt.datetime(2026, 1, 6, 15, 0, 3))
+    assert estimator._is_quote_fresh(quote, dt.datetime(2026, 1, 6, 21, 0))
+    assert not estimator._is_quote_fresh(quote, dt.datetime(2026, 1, 7, 9, 0))
+
+
+def test_beijing_now_is_utc_plus_8():
+    utc = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    delta = estimator._beijing_now() - utc
+    assert abs(delta - dt.timedelta(hours=8)) < dt.timedelta(seconds=5)
+
+
+def test_session_listed_detection_is_cached(monkeypatch):
+    monkeypatch.setattr(estimator, "_LISTED_FUNDS", {})
+    calls = []
+
+    def fake_fetch(codes):
+        calls.append(list(codes))
+        return {"161725": _listed_quote()}, {"501018"}
+
+    monkeypatch.setattr(estimator, "fetch_listed_fund_quotes", fake_fetch)
+    estimator.fetch_session_listed_quotes(["161725", "501018"])
+    estimator.fetch_session_listed_quotes(["161725", "501018"])
+    assert calls == [["161725", "501018"], ["161725"]]
+
+
+def test_session_listed_detection_survives_no_trade_yet(monkeypatch):
+    monkeypatch.setattr(estimator, "_LISTED_FUNDS", {})
+    rounds = iter([({"161725": None}, set()), ({"161725": _listed_quote()}, set())])
+    monkeypatch.setattr(estimator, "fetch_listed_fund_quotes", lambda codes: next(rounds))
+    assert estimator.fetch_session_listed_quotes(["161725"]) == {}
+    assert estimator._LISTED_FUNDS == {"161725": True}
+    assert "161725" in estimator.fetch_session_listed_quotes(["161725"])
+
+
+def test_session_listed_detection_ignores_missing_symbols(monkeypatch):
+    monkeypatch.setattr(estimator, "_LISTED_FUNDS", {})
+    calls = []
+
+    def throttled(codes):
+        calls.append(list(codes))
+        return {}, set()
+
+    monkeypatch.setattr(estimator, "fetch_listed_fund_quotes", throttled)
+    estimator.fetch_session_listed_quotes(["161725", "510300"])
+    estimator.fetch_session_listed_quotes(["161725", "510300"])
+    assert estimator._LISTED_FUNDS == {}
+    assert calls == [["161725", "510300"], ["161725", "510300"]]
+
+
+def _run_estimate_many_with_quote(
+    monkeypatch,
+    quote: ListedQuote,
+    nav_date: str = "2026-01-05",
+) -> tuple[FundEstimate, list[tuple[str, object]], list[str]]:
+    nav_calls = _fresh_listed_setup(monkeypatch, nav_date=nav_date)
+    monkeypatch.setattr(
+        estimator, "fetch_listed_fund_quotes", lambda codes: ({"161725": quote}, set())
+    )
+    slow_path_calls: list[tuple[str, object]] = []
+
+    def fake_estimate_fund(code: str, min_coverage: float = 35.0, nav=None) -> FundEstimate:
+        slow_path_calls.append((code, nav))
+        return FundEstimate(
+            fund_code=code,
+            timestamp="2026-01-06 10:20:00",
+            last_nav=0.8,
+            estimated_nav=0.8,
+            estimated_change_percent=0.0,
+            method="holdings",
+            coverage_percent=50.0,
+            detail="ok",
+            source_api=estimator.HOLDINGS_SOURCE,
+        )
+
+    monkeypatch.setattr(estimator, "estimate_fund", fake_estimate_fund)
+    [out] = estimator.estimate_many(["161725"])
+    return out, slow_path_calls, nav_calls
+
+
+def test_estimate_many_fresh_listed_quote_skips_holdings(monkeypatch):
+    out, slow_path_calls, _ = _run_estimate_many_with_quote(monkeypatch, _listed_quote())
+    assert out.method == "listed"
+    assert slow_path_calls == []
+
+
+def test_estimate_many_stale_listed_quote_falls_back(monkeypatch):
+    stale = _listed_quote(BEIJING_NOW - dt.timedelta(minutes=10))
+    out, slow_path_calls, _ = _run_estimate_many_with_quote(monkeypatch, stale)
+    assert out.method == "holdings"
+    assert slow_path_calls == [("161725", None)]
+
+
+def test_estimate_many_nav_mismatch_reuses_fetched_nav(monkeypatch):
+    out, slow_path_calls, nav_calls = _run_estimate_many_with_quote(
+        monkeypatch, _listed_quote(), nav_date="2026-01-02"
+    )
+    assert out.method == "holdings"
+    assert slow_path_calls == [("161725", (0.8, "2026-01-02"))]
+    assert nav_calls == ["161725"]
+
+
+def test_estimate_fund_uses_given_nav(monkeypatch):
+    def boom(_: str):
+        raise AssertionError("nav must not be refetched")
+
+    monkeypatch.setattr(estimator, "fetch_fund_last_nav", boom)
+    monkeypatch.setattr(estimator, "fetch_fund_holdings", lambda code, topn=10: [])
+    monkeypatch.setattr(estimator, "fetch_tracking_index_candidates", lambda code: [])
+    out = estimator.estimate_fund("161725", nav=(0.8, "2026-01-02"))
+    assert out.last_nav == 0.8
@@ -1,4 +1,10 @@
-from realtime_fund_valuator.data_sources import _parse_sina_change_percent, _to_sina_symbol
+import realtime_fund_valuator.data_sources as ds
+from realtime_fund_valuator.data_sources import (
+    _parse_sina_change_percent,
+    _parse_sina_listed_quote,
+    _to_listed_fund_symbol,
+    _to_sina_symbol,
+)
 
 
 def test_to_sina_symbol():
@@ -18,3 +24,40 @@ def test_parse_hk_quote():
     fields = ["name", "", "", "200.0", "", "", "210.0"]
     pct = _parse_sina_change_percent("hk00700", fields)
     assert round(pct, 3) == 5.0
+
+
+def test_to_listed_fund_symbol():
+    assert _to_listed_fund_symbol("161725") == "sz161725"
+    assert _to_listed_fund_symbol("510300") == "sh510300"
+    assert _to_listed_fund_symbol("000311") is None
+
+
+def test_parse_listed_quote():
+    fields = ["name", "1.0", "1.000", "1.020"] + ["0"] * 26 + ["2026-01-05", "10:15:00", "00"]
+    q = _parse_sina_listed_quote("sz161725", fields)
+    assert q.price == 1.02
+    assert q.prev_close == 1.0
+    assert q.quote_time.strftime("%Y-%m-%d %H:%M:%S") == "2026-01-05 10:15:00"
+
+
+def test_fetch_listed_quotes_keeps_untraded_listed_fund(monkeypatch):
+    untraded = ",".join(["name", "0.000", "1.000", "0.000"] + ["0"] * 26 + ["2026-01-05", "09:10:00"])
+    text = f'var hq_str_sz161725="{untraded}";\nvar hq_str_sh501018="";\n'
+    monkeypatch.setattr(ds, "_http_get", lambda url, referer=None: text)
+    assert ds.fetch_listed_fund_quotes(["161725", "501018", "510300"]) == (
+        {"161725": None},
+        {"501018"},
+    )
+
+
+def test_fetch_listed_quotes_throttle_page_marks_nothing_unlisted(monkeypatch):
+    monkeypatch.setattr(ds, "_http_get", lambda url, referer=None: "Kinsoku jikou desu!")
+    assert ds.fetch_listed_fund_quotes(["161725", "510300"]) == ({}, set())
+
+
+def test_iter_sina_lines():
+    text = 'var hq_str_sh600000="name,1,2";\nvar hq_str_hk00700="";\ngarbage\n'
+    assert list(ds._iter_sina_lines(text)) == [
+        ("sh600000", ["name", "1", "2"]),
+        ("hk00700", []),
+    ]
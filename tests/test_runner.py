@@ -1,3 +1,8 @@
+import sys
+
+import pytest
+
+from realtime_fund_valuator import runner
 from realtime_fund_valuator.models import FundEstimate
 from realtime_fund_valuator.runner import (
     _format_holding_rows,
@@ -59,3 +64,9 @@ def test_format_record_contains_source():
     e.source_api = "sina_hq"
     row = _format_record(e)
     assert "source=sina_hq" in row
+
+
+def test_no_direct_requires_egress_proxy(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["fund-valuator", "--once", "--no-direct"])
+    with pytest.raises(SystemExit):
+        runner.main()